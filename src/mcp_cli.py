@@ -6,30 +6,60 @@ import uuid
 def format_table(results, start_index=1):
     if not results:
         return "无数据"
-    
-    columns = list(results[0].keys())
-    columns = ["编号"] + columns
-    
+
+    # 超过1000行时改走pandas的C层批量格式化，比逐单元格str()快得多
+    if len(results) > 1000:
+        try:
+            import pandas as pd
+        except ImportError:
+            pd = None
+        if pd is not None:
+            df = pd.DataFrame.from_records(results)
+            df.insert(0, "编号", range(start_index, start_index + len(results)))
+            return df.to_string(index=False)
+
+    columns = tuple(results[0])  # 迭代dict即得列名，tuple比list轻且不可变
+    header_cells = ["编号"] + [str(col) for col in columns]
+
+    # 每个单元格只做一次str()转换，宽度计算和渲染都复用缓存结果
+    str_rows = [
+        [str(idx)] + [str(row.get(col, "")) for col in columns]
+        for idx, row in enumerate(results, start=start_index)
+    ]
+
     # 计算每列最大宽度
-    col_widths = [max(len("编号"), len(str(start_index + len(results) - 1)))]
-    for col in columns[1:]:
-        col_widths.append(max(len(str(col)), max(len(str(row.get(col, ""))) for row in results)))
-    
+    col_widths = [len(cell) for cell in header_cells]
+    for cells in str_rows:
+        for i, cell in enumerate(cells):
+            if len(cell) > col_widths[i]:
+                col_widths[i] = len(cell)
+
     # 表头
-    header_cells = [columns[0].ljust(col_widths[0])] + [str(col).ljust(w) for col, w in zip(columns[1:], col_widths[1:])]
-    header = "| " + " | ".join(header_cells) + " |"
-    
-    # 分隔线 - 修复：使用与表头相同的格式
-    sep_cells = ["-" * col_widths[0]] + ["-" * w for w in col_widths[1:]]
-    sep = "| " + " | ".join(sep_cells) + " |"
-    
+    header = "| " + " | ".join(cell.ljust(w) for cell, w in zip(header_cells, col_widths)) + " |"
+
+    # 分隔线
+    sep = "| " + " | ".join("-" * w for w in col_widths) + " |"
+
     # 数据行
-    rows = []
-    for idx, row in enumerate(results, start=start_index):
-        row_cells = [str(idx).ljust(col_widths[0])] + [str(row.get(col, "")).ljust(w) for col, w in zip(columns[1:], col_widths[1:])]
-        rows.append("| " + " | ".join(row_cells) + " |")
-    
-    return "\n".join([header, sep] + rows)
+    lines = [header, sep]
+    lines.extend(
+        "| " + " | ".join(cell.ljust(w) for cell, w in zip(cells, col_widths)) + " |"
+        for cells in str_rows
+    )
+
+    return "\n".join(lines)
+
+def show_page(query_result, page, page_size):
+    """打印一页查询结果，返回服务端给出的分页元信息"""
+    results = query_result.get("results", [])
+    pagination = query_result.get("pagination") or {}
+    total_pages = pagination.get("total_pages") or 1
+    total_rows = pagination.get("total_rows", len(results))
+    start = page * page_size
+    print(f"\n📋 查询结果: (第{page + 1}/{total_pages}页)\n"
+          + format_table(results, start_index=start + 1)
+          + f"\n共 {total_rows} 条记录")
+    return pagination
 
 def main():
     print("🚀 智能自然语言查询系统启动")
@@ -43,12 +73,14 @@ def main():
     session_id = f"cli_session_{int(time.time())}_{uuid.uuid4().hex[:8]}"
     print(f"🆔 会话ID: {session_id}")
     print()
-    last_results = None
     last_sql = None
     last_page = 0
+    last_pagination = {}
     page_size = 50
+    max_question_len = 500  # 防止误粘贴大段文本整段送进LLM
     history = []  # 多轮上下文历史
     llm_client = create_llm_client()
+    schema_info = None  # 表结构会话内只拉取一次
     while True:
         question = input("🤔 请输入您的问题或命令: ").strip()
         if question.lower() in ["quit", "exit", "退出"]:
@@ -57,58 +89,57 @@ def main():
         if not question:
             continue
         if question.lower() == "next":
-            if last_results is None:
+            if last_sql is None:
                 print("❌ 请先进行一次查询。")
                 continue
-            total_rows = len(last_results)
-            total_pages = (total_rows + page_size - 1) // page_size if total_rows > 0 else 1
-            if last_page + 1 >= total_pages:
+            if not last_pagination.get("has_next"):
                 print("❌ 已经是最后一页。")
                 continue
-            last_page += 1
-            start = last_page * page_size
-            end = start + page_size
-            page_data = last_results[start:end]
-            print(f"\n📋 查询结果: (第{last_page+1}/{total_pages}页)")
-            print(format_table(page_data, start_index=start+1))
+            # 按页向服务端取数，不在客户端囤积完整结果
+            query_result = mcp_query(last_sql, page=last_page + 1, page_size=page_size,
+                                     session_id=session_id)
+            if query_result.get("success"):
+                last_page += 1
+                last_pagination = show_page(query_result, last_page, page_size)
+            else:
+                print(f"查询失败: {query_result.get('error', '未知错误')}")
             continue
         if question.lower() == "prev":
-            if last_results is None:
+            if last_sql is None:
                 print("❌ 请先进行一次查询。")
                 continue
             if last_page == 0:
                 print("❌ 已经是第一页。")
                 continue
-            last_page -= 1
-            start = last_page * page_size
-            end = start + page_size
-            page_data = last_results[start:end]
-            print(f"\n📋 查询结果: (第{last_page+1}/{(len(last_results) + page_size - 1) // page_size}页)")
-            print(format_table(page_data, start_index=start+1))
+            query_result = mcp_query(last_sql, page=last_page - 1, page_size=page_size,
+                                     session_id=session_id)
+            if query_result.get("success"):
+                last_page -= 1
+                last_pagination = show_page(query_result, last_page, page_size)
+            else:
+                print(f"查询失败: {query_result.get('error', '未知错误')}")
+            continue
+        if len(question) > max_question_len:
+            print(f"❌ 输入过长（{len(question)}字符，上限{max_question_len}），请精简后重试。")
             continue
         print(f"\n🔍 处理您的问题: {question}")
-        # 获取 schema
-        schema_info = mcp_schema()
+        # 获取 schema（仅首次，后续问题复用，省一次HTTP往返）
+        if schema_info is None:
+            schema_info = mcp_schema()
         # LLM 生成 SQL，传递多轮上下文
         sql = llm_client.generate_sql(question, schema_info, history=history)
         print(f"生成SQL: {sql}")
-        # 通过 MCP HTTP 查询
-        query_result = mcp_query(sql, page=0, page_size=1000000, session_id=session_id, user_message=question)
+        # 通过 MCP HTTP 查询（只取第一页，翻页时再按需取）
+        query_result = mcp_query(sql, page=0, page_size=page_size, session_id=session_id, user_message=question)
         if query_result.get("success"):
-            last_results = query_result.get("results", [])
             last_sql = sql
             last_page = 0
-            total_rows = len(last_results)
-            total_pages = (total_rows + page_size - 1) // page_size if total_rows > 0 else 1
-            page_data = last_results[:page_size]
-            print(f"\n📋 查询结果: (第1/{total_pages}页)")
-            print(format_table(page_data, start_index=1))
-            print(f"共 {total_rows} 条记录")
+            last_pagination = show_page(query_result, 0, page_size)
         else:
             print(f"查询失败: {query_result.get('error', '未知错误')}")
-            last_results = None
             last_sql = None
             last_page = 0
+            last_pagination = {}
         # 更新多轮上下文历史
         history.append({"role": "user", "content": question})
         history.append({"role": "assistant", "content": sql})
@@ -1,8 +1,28 @@
+import time
+
 import requests
 
+# 可选用orjson解析响应，大结果集比标准json快数倍；未安装则用requests内置解析
+try:
+    import orjson
+
+    def _parse_response(resp):
+        return orjson.loads(resp.content)
+except ImportError:
+    def _parse_response(resp):
+        return resp.json()
+
 MCP_SERVER_URL = "http://localhost:8000"
 
-def mcp_query(sql, page=0, page_size=50, session_id="default", user_message=""):
+# 统一请求超时（连接, 读取），避免服务端卡死时客户端无限等待
+REQUEST_TIMEOUT = (5, 60)
+
+# 模块级Session复用TCP连接(keep-alive)，避免每次调用重新建连；
+# 显式挂Adapter设定连接池大小，支撑并发调用时的连接复用
+_session = requests.Session()
+_session.mount("http://", requests.adapters.HTTPAdapter(pool_connections=10, pool_maxsize=10))
+
+def mcp_query(sql, page=0, page_size=50, session_id="default", user_message="", include_schema=False):
     url = f"{MCP_SERVER_URL}/query"
     payload = {
         "sql": sql,
@@ -11,16 +31,41 @@ def mcp_query(sql, page=0, page_size=50, session_id="default", user_message=""):
         "session_id": session_id,
         "user_message": user_message
     }
-    resp = requests.post(url, json=payload)
-    return resp.json()
+    if include_schema:
+        # 查询和表结构合并为一次往返，结果里多出 "schema" 字段
+        payload["include_schema"] = True
+    resp = _session.post(url, json=payload, timeout=REQUEST_TIMEOUT)
+    return _parse_response(resp)
+
+def mcp_query_batch(sqls, page_size=50):
+    """一次请求批量执行多条只读SQL，减少HTTP与连接往返"""
+    url = f"{MCP_SERVER_URL}/batch_query"
+    payload = {
+        "sqls": sqls,
+        "page_size": page_size
+    }
+    resp = _session.post(url, json=payload, timeout=REQUEST_TIMEOUT)
+    return _parse_response(resp)
+
+# 客户端本地schema缓存：会话内表结构几乎不变，不必每个问题都打一次HTTP
+SCHEMA_CACHE_TTL = 300
+_schema_cache = {}  # table(None表示全量) -> (数据, 过期时刻)
 
-def mcp_schema(table=None):
+def mcp_schema(table=None, force_refresh=False):
+    if not force_refresh:
+        cached = _schema_cache.get(table)
+        if cached is not None and time.monotonic() < cached[1]:
+            return cached[0]
     url = f"{MCP_SERVER_URL}/schema"
     params = {"table": table} if table else {}
-    resp = requests.get(url, params=params)
-    return resp.json()
+    if force_refresh:
+        params["refresh"] = "1"
+    resp = _session.get(url, params=params, timeout=REQUEST_TIMEOUT)
+    data = _parse_response(resp)
+    _schema_cache[table] = (data, time.monotonic() + SCHEMA_CACHE_TTL)
+    return data
 
 def mcp_logs():
     url = f"{MCP_SERVER_URL}/logs"
-    resp = requests.get(url)
-    return resp.json() 
\ No newline at end of file
+    resp = _session.get(url, timeout=REQUEST_TIMEOUT)
+    return _parse_response(resp) 
\ No newline at end of file
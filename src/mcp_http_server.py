@@ -1,8 +1,26 @@
-from mcp_server import get_schema_filtered, query_data, get_logs
+from mcp_server import get_schema_cached, get_schema_filtered, query_data, query_batch, get_logs
 from flask import Flask, request, jsonify
 
 app = Flask(__name__)
 
+# 可选用orjson序列化响应，大结果集比标准json快数倍；未安装则用默认实现
+try:
+    import orjson
+    from flask.json.provider import JSONProvider
+
+    class OrjsonProvider(JSONProvider):
+        def dumps(self, obj, **kwargs) -> str:
+            # default=str兜底Decimal/timedelta等DB驱动返回的类型，
+            # 与Flask默认Provider的行为对齐
+            return orjson.dumps(obj, default=str).decode()
+
+        def loads(self, s, **kwargs):
+            return orjson.loads(s)
+
+    app.json = OrjsonProvider(app)
+except ImportError:
+    pass
+
 @app.route('/query', methods=['POST'])
 def http_query():
     data = request.json
@@ -12,16 +30,30 @@ def http_query():
     session_id = data.get('session_id', 'default')
     user_message = data.get('user_message', '')
     result = query_data(sql, page, page_size, session_id, user_message)
+    # 可选随查询结果一并返回表结构，省去客户端单独的 /schema 往返
+    if data.get('include_schema'):
+        result["schema"] = get_schema_cached()
     return jsonify(result)
 
+@app.route('/batch_query', methods=['POST'])
+def http_batch_query():
+    data = request.json
+    sqls = data.get('sqls', [])
+    page_size = data.get('page_size', 50)
+    return jsonify(query_batch(sqls, page_size))
+
 @app.route('/schema', methods=['GET'])
 def http_schema():
     table = request.args.get('table')
-    return jsonify(get_schema_filtered(table))
+    if table:
+        return jsonify(get_schema_filtered(table))
+    refresh = request.args.get('refresh') in ('1', 'true')
+    return jsonify(get_schema_cached(force_refresh=refresh))
 
 @app.route('/logs', methods=['GET'])
 def http_logs():
     return jsonify(get_logs())
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=8000) 
\ No newline at end of file
+    # threaded=True: 开发服务器并发处理请求，避免慢查询阻塞其他客户端
+    app.run(host='0.0.0.0', port=8000, threaded=True) 
\ No newline at end of file
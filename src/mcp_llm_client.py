@@ -1,4 +1,20 @@
+import hashlib
+import json
 import requests
+
+# 可选用orjson做请求体序列化与响应解析，提示词/补全较大时比标准json快数倍
+try:
+    import orjson
+
+    def _dumps(obj) -> bytes:
+        return orjson.dumps(obj)
+
+    _loads = orjson.loads
+except ImportError:
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj, ensure_ascii=False).encode()
+
+    _loads = json.loads
 from typing import Optional, Dict
 import os
 from dataclasses import dataclass
@@ -17,13 +33,25 @@ class LLMConfig:
 
 class LLMClient:
     """通义千问API客户端，负责自然语言转SQL"""
-    
+
+    # 缓存上限：客户端是进程级长生命周期对象（Streamlit侧还经
+    # st.cache_resource常驻），不设上限会随不同问题/表结构无限增长。
+    # 超限时按插入顺序淘汰最旧条目，与服务端lru_cache(256)的量级对齐
+    SQL_CACHE_MAX = 256
+    PROMPT_CACHE_MAX = 16
+
     def __init__(self, config: LLMConfig):
         self.config = config
-        self.headers = {
+        # Session复用TLS连接，多轮对话时省去每次API调用的握手开销
+        self.session = requests.Session()
+        self.session.headers.update({
             "Authorization": f"Bearer {config.api_key}",
             "Content-Type": "application/json"
-        }
+        })
+        # 生成结果缓存：同样的问题+同样的表结构直接复用SQL，省一次API往返和token
+        self._sql_cache = {}
+        # 系统提示词缓存：表结构不变时不重复拼接schema文本
+        self._prompt_cache = {}
     
     def _build_system_prompt(self, schema_info: Optional[Dict] = None) -> str:
         """
@@ -42,13 +70,16 @@ class LLMClient:
 
             """
         if schema_info and isinstance(schema_info, dict) and "tables" in schema_info:
-            schema_text = "\n数据库结构信息：\n"
+            # 用list+join拼接，避免循环内字符串+=的平方级复制
+            parts = ["\n数据库结构信息：\n"]
             for table_name, columns in schema_info["tables"].items():
-                schema_text += f"\n表名：{table_name}\n字段：\n"
-                for col in columns:
-                    schema_text += f"  - {col.get('name', '')} ({col.get('type', '')})\n"
+                parts.append(f"\n表名：{table_name}\n字段：\n")
+                parts.extend(
+                    f"  - {col.get('name', '')} ({col.get('type', '')})\n"
+                    for col in columns
+                )
 
-            base_prompt += schema_text + "\n"
+            base_prompt += "".join(parts) + "\n"
             base_prompt += """
             示例：
             用户问题：列出所有课程的标题，并按标题和学分排序
@@ -60,32 +91,77 @@ class LLMClient:
             请严格根据上述表和字段，根据用户问题生成SQL语句：
             """
         return base_prompt
-    
-    def _call_api(self, messages: list) -> str:
-        """调用通义千问API"""
+
+    @staticmethod
+    def _schema_key(schema_info: Optional[Dict]) -> str:
+        """表结构的稳定摘要，用作提示词/SQL缓存键"""
+        schema_text = json.dumps(schema_info, sort_keys=True, default=str) if schema_info else ""
+        return hashlib.sha256(schema_text.encode()).hexdigest()
+
+    def _system_prompt_cached(self, schema_info: Optional[Dict], schema_key: str) -> str:
+        prompt = self._prompt_cache.get(schema_key)
+        if prompt is None:
+            prompt = self._build_system_prompt(schema_info)
+            if len(self._prompt_cache) >= self.PROMPT_CACHE_MAX:
+                self._prompt_cache.pop(next(iter(self._prompt_cache)))
+            self._prompt_cache[schema_key] = prompt
+        return prompt
+
+    def _call_api(self, messages: list, stop_at_semicolon: bool = False) -> str:
+        """调用通义千问API。
+
+        stop_at_semicolon=True 时走流式接口，读到第一个分号就断开连接：
+        单条SQL生成不必等模型把尾部空白/解释吐完，也能兜住失控输出。
+        """
         payload = {
             "model": self.config.model,
             "messages": messages,
             "temperature": self.config.temperature,
             "max_tokens": self.config.max_tokens,
-            "stream": False
+            "stream": stop_at_semicolon
         }
-        
+
         try:
-            response = requests.post(
+            # Session头里已有Content-Type: application/json，直接传序列化后的bytes
+            response = self.session.post(
                 f"{self.config.base_url}/chat/completions",
-                headers=self.headers,
-                json=payload,
-                timeout=30
+                data=_dumps(payload),
+                timeout=30,
+                stream=stop_at_semicolon
             )
             response.raise_for_status()
-            
-            result = response.json()
-            return result["choices"][0]["message"]["content"].strip()
-            
+
+            if not stop_at_semicolon:
+                result = _loads(response.content)
+                return result["choices"][0]["message"]["content"].strip()
+
+            # 解析SSE流，累积增量内容，见到分号立即停止
+            parts = []
+            try:
+                for line in response.iter_lines(decode_unicode=True):
+                    if not line or not line.startswith("data:"):
+                        continue
+                    data = line[5:].strip()
+                    if data == "[DONE]":
+                        break
+                    chunk = _loads(data)
+                    choices = chunk.get("choices")
+                    if not choices:
+                        continue
+                    delta = choices[0].get("delta", {}).get("content")
+                    if delta:
+                        parts.append(delta)
+                        if ";" in delta:
+                            break
+            finally:
+                response.close()
+            return "".join(parts).strip()
+
         except requests.exceptions.RequestException as e:
             raise Exception(f"API调用失败: {str(e)}")
-        except KeyError as e:
+        except (KeyError, ValueError) as e:
+            # orjson/json解析失败抛的是ValueError子类，和缺字段一样
+            # 归为响应格式错误，不让原始异常穿透到调用方
             raise Exception(f"API响应格式错误: {str(e)}")
     
     def generate_sql(self, question: str, schema_info: Optional[Dict] = None, history: Optional[list] = None) -> str:
@@ -98,15 +174,61 @@ class LLMClient:
         Returns:
             生成的SQL语句
         """
-        system_prompt = self._build_system_prompt(schema_info)
+        schema_key = self._schema_key(schema_info)
+        # 无历史上下文时按 (问题, 表结构) 缓存；带历史的追问语义依赖上下文，不缓存
+        cache_key = None
+        if not history:
+            cache_key = hashlib.sha256(question.encode()).hexdigest() + schema_key
+            cached = self._sql_cache.get(cache_key)
+            if cached is not None:
+                return cached
+        system_prompt = self._system_prompt_cached(schema_info, schema_key)
         messages = [{"role": "system", "content": system_prompt}]
         if history:
             messages.extend(history)
         messages.append({"role": "user", "content": question})
-        sql_response = self._call_api(messages)
+        sql_response = self._call_api(messages, stop_at_semicolon=True)
         sql = self._clean_sql(sql_response)
+        if cache_key is not None:
+            if len(self._sql_cache) >= self.SQL_CACHE_MAX:
+                self._sql_cache.pop(next(iter(self._sql_cache)))
+            self._sql_cache[cache_key] = sql
         return sql
     
+    def generate_sql_batch(self, questions: list, schema_info: Optional[Dict] = None) -> list:
+        """把多个独立问题合并进一次API调用，摊薄系统提示词（表结构）token。
+
+        Args:
+            questions: 自然语言问题列表
+            schema_info: 数据库结构信息
+        Returns:
+            与questions等长的SQL列表；解析失败的条目为空串
+        """
+        if not questions:
+            return []
+        if len(questions) == 1:
+            return [self.generate_sql(questions[0], schema_info)]
+        system_prompt = self._build_system_prompt(schema_info)
+        system_prompt += (
+            "\n以下是多个相互独立的问题，请逐一生成SQL，"
+            "按\"1. SQL语句\"的编号格式逐行返回，不要输出其他内容：\n"
+        )
+        numbered = "\n".join(f"{i}. {q}" for i, q in enumerate(questions, 1))
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": numbered}
+        ]
+        response = self._call_api(messages)
+        # 按编号拆回各条SQL，缺失的编号留空串
+        sqls = [""] * len(questions)
+        for line in response.splitlines():
+            m = re.match(r'\s*(\d+)[.、:：]\s*(.+)', line)
+            if m:
+                idx = int(m.group(1)) - 1
+                if 0 <= idx < len(questions) and not sqls[idx]:
+                    sqls[idx] = self._clean_sql(m.group(2))
+        return sqls
+
     def _clean_sql(self, sql_text: str) -> str:
         """清理SQL语句，移除不必要的格式和前缀"""
         # 移除markdown代码块标记
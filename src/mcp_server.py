@@ -1,7 +1,13 @@
 from typing import Any, Dict, List
+import atexit
 import os
 import logging
+import logging.handlers
+import shutil
+import threading
 import time
+from contextlib import contextmanager
+from functools import lru_cache
 from pathlib import Path
 import re
 from collections import deque
@@ -28,17 +34,22 @@ DB_CONFIG = {
 }
 
 # ----- 分页状态管理 -----
+# Flask开了threaded后分页状态可能被并发读写，互斥量只护状态变更，不罩住DB查询
+_pagination_lock = threading.Lock()
+
 pagination_state = {
     "last_sql": "",
-    "last_results": None,
+    "last_sql_raw": "",  # 原始SQL，翻页时重新执行用
+    "last_results": None,  # 仅SHOW/DESC等不可加LIMIT的语句缓存完整结果
     "current_page": 0,
     "page_size": 50,  # 每页显示行数
     "total_rows": 0
 }
 
 # ----- 对话上下文管理 -----
-# 存储所有活跃的对话会话
+# 存储所有活跃的对话会话；threaded Flask + 后台清理线程并发读写，需加锁
 conversation_sessions = {}
+_sessions_lock = threading.RLock()
 
 # 每个会话的最大上下文长度
 MAX_CONTEXT_LENGTH = 10
@@ -48,28 +59,44 @@ CONTEXT_EXPIRE_TIME = 3600  # 1小时
 
 class ConversationSession:
     """对话会话管理类"""
+    # 固定属性集合，去掉每实例__dict__：会话多时省内存，属性访问也更快
+    __slots__ = ("session_id", "context", "last_activity", "expires_at", "metadata")
+
     def __init__(self, session_id: str):
+        now = time.time()
         self.session_id = session_id
         self.context = deque(maxlen=MAX_CONTEXT_LENGTH)
-        self.last_activity = time.time()
+        self.last_activity = now
+        # 过期时刻用单调时钟记录，检查时只需一次浮点比较，且不受系统时间回拨影响
+        self.expires_at = time.monotonic() + CONTEXT_EXPIRE_TIME
         self.metadata = {
-            "created_at": time.time(),
+            "created_at": now,
             "total_queries": 0,
             "successful_queries": 0,
             "failed_queries": 0
         }
     
-    def add_context(self, sql: str, result: Dict[str, Any], user_message: str = ""):
-        """添加上下文信息"""
+    def add_context(self, sql: str, result: Dict[str, Any], user_message: str = "", now: float = None):
+        """添加上下文信息；now可由调用方传入请求开始时刻，避免重复取时间"""
+        if now is None:
+            now = time.time()
+        # 上下文只保留结果摘要：消费方只读状态和行数，
+        # 缓存整页行数据既占内存又拖慢上下文摘要的序列化
+        result_summary = {
+            key: result[key]
+            for key in ("success", "error", "rowCount", "totalRows")
+            if key in result
+        }
         context_item = {
-            "timestamp": time.time(),
+            "timestamp": now,
             "sql": sql,
-            "result": result,
+            "result": result_summary,
             "user_message": user_message,
             "success": result.get("success", False)
         }
         self.context.append(context_item)
-        self.last_activity = time.time()
+        self.last_activity = now
+        self.expires_at = time.monotonic() + CONTEXT_EXPIRE_TIME
         
         # 更新统计信息
         self.metadata["total_queries"] += 1
@@ -90,24 +117,41 @@ class ConversationSession:
     
     def is_expired(self) -> bool:
         """检查会话是否过期"""
-        return time.time() - self.last_activity > CONTEXT_EXPIRE_TIME
+        return time.monotonic() > self.expires_at
 
 def get_or_create_session(session_id: str) -> ConversationSession:
     """获取或创建会话"""
-    if session_id not in conversation_sessions:
-        conversation_sessions[session_id] = ConversationSession(session_id)
-    return conversation_sessions[session_id]
+    # 单次哈希查找：每个请求都会走到这里，省掉 in + 取值的双重探查
+    with _sessions_lock:
+        session = conversation_sessions.get(session_id)
+        if session is None:
+            session = conversation_sessions[session_id] = ConversationSession(session_id)
+        return session
 
 def cleanup_expired_sessions():
     """清理过期的会话"""
-    expired_sessions = []
-    for session_id, session in conversation_sessions.items():
-        if session.is_expired():
-            expired_sessions.append(session_id)
-    
+    with _sessions_lock:
+        expired_sessions = [
+            session_id for session_id, session in conversation_sessions.items()
+            if session.is_expired()
+        ]
+        for session_id in expired_sessions:
+            del conversation_sessions[session_id]
     for session_id in expired_sessions:
-        del conversation_sessions[session_id]
-        logger.info(f"清理过期会话: {session_id}")
+        logger.info("清理过期会话: %s", session_id)
+
+SESSION_CLEANUP_INTERVAL = 60  # 过期会话后台清理间隔（秒）
+
+def _session_cleanup_loop():
+    """后台定期清理过期会话，请求路径不再每次全量扫描"""
+    while True:
+        time.sleep(SESSION_CLEANUP_INTERVAL)
+        try:
+            cleanup_expired_sessions()
+        except Exception as e:
+            logger.warning("过期会话清理异常: %s", e)
+
+threading.Thread(target=_session_cleanup_loop, daemon=True).start()
 
 # ----- 对话上下文管理结束 -----
 
@@ -116,56 +160,88 @@ SENSITIVE_FIELDS = ['password', 'salary', 'ssn', 'credit_card']
 def reset_pagination():
     """重置分页状态"""
     pagination_state["last_sql"] = ""
+    pagination_state["last_sql_raw"] = ""
     pagination_state["last_results"] = None
     pagination_state["current_page"] = 0
     pagination_state["total_rows"] = 0
 
+def make_pagination_info(page: int, page_size: int, total_rows: int, rows_on_page: int) -> Dict[str, Any]:
+    """根据总行数计算分页元信息"""
+    total_pages = (total_rows + page_size - 1) // page_size if total_rows > 0 else 0
+    start_idx = page * page_size
+    return {
+        "current_page": page,
+        "total_pages": total_pages,
+        "page_size": page_size,
+        "total_rows": total_rows,
+        "has_next": page < total_pages - 1,
+        "has_prev": page > 0,
+        "showing_rows": f"{start_idx + 1}-{start_idx + rows_on_page}" if rows_on_page else "0-0"
+    }
+
 def get_page_data(results: List[Dict], page: int, page_size: int) -> Dict[str, Any]:
-    """获取指定页的数据"""
+    """获取指定页的数据（对已缓存的完整结果切片）"""
     total_rows = len(results)
-    total_pages = (total_rows + page_size - 1) // page_size if total_rows > 0 else 0
-    
     start_idx = page * page_size
     end_idx = min(start_idx + page_size, total_rows)
-    
+
     page_data = results[start_idx:end_idx] if start_idx < total_rows else []
-    
+
     return {
         "data": page_data,
-        "pagination": {
-            "current_page": page,
-            "total_pages": total_pages,
-            "page_size": page_size,
-            "total_rows": total_rows,
-            "has_next": page < total_pages - 1,
-            "has_prev": page > 0,
-            "showing_rows": f"{start_idx + 1}-{end_idx}" if page_data else "0-0"
-        }
+        "pagination": make_pagination_info(page, page_size, total_rows, len(page_data))
     }
 # ----- 分页功能结束 -----
 
 # ----- 日志功能 -----
+# 日志目录在项目根目录下的 logs 文件夹，导入时创建一次并缓存，
+# 之后每次取用都不再stat文件系统
+_LOG_DIR = Path(__file__).resolve().parent.parent / "logs"
+_LOG_DIR.mkdir(parents=True, exist_ok=True)
+
 def ensure_log_directory():
-    """确保日志目录存在，目录在项目根目录下的 logs 文件夹"""
-    # 项目根目录，假设当前文件在 /src 或更深目录下
-    project_root = Path(__file__).resolve().parent.parent
-    log_dir = project_root / "logs"
-    if not log_dir.exists():
-        log_dir.mkdir(parents=True)
-        print(f"创建日志目录: {log_dir}")
-    return log_dir
+    """返回日志目录（模块加载时已创建）"""
+    return _LOG_DIR
 
 MAX_LOG_LINES = 2000  # 日志最大保留行数
 
 def trim_log_file(log_file: Path, max_lines: int = MAX_LOG_LINES):
-    """修剪日志文件，只保留最新max_lines行"""
+    """修剪日志文件，只保留最新max_lines行。
+
+    从EOF反向分块扫描定位截断点，再用固定缓冲把尾部拷进临时文件后
+    原子替换；全程不把历史日志整个读进内存。
+    """
     if not log_file.exists():
         return
-    with open(log_file, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
-    if len(lines) > max_lines:
-        with open(log_file, 'w', encoding='utf-8') as f:
-            f.writelines(lines[-max_lines:])
+    block = 8192
+    with open(log_file, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        pos = size
+        newlines = 0
+        cutoff = 0
+        while pos > 0:
+            read = min(block, pos)
+            pos -= read
+            f.seek(pos)
+            data = f.read(read)
+            found = data.count(b'\n')
+            if newlines + found > max_lines:
+                # 截断点在本块内：定位到第skip个换行之后
+                skip = found - (max_lines - newlines)
+                offset = -1
+                for _ in range(skip):
+                    offset = data.index(b'\n', offset + 1)
+                cutoff = pos + offset + 1
+                break
+            newlines += found
+        if cutoff == 0:
+            return  # 行数未超限，无需修剪
+        f.seek(cutoff)
+        tmp_file = log_file.with_suffix('.tmp')
+        with open(tmp_file, 'wb') as dst:
+            shutil.copyfileobj(f, dst, length=131072)
+    os.replace(tmp_file, log_file)
 
 def setup_logger():
     """设置日志配置，日志追加写入"""
@@ -188,9 +264,24 @@ def setup_logger():
     )
 
     class TrimmingFileHandler(logging.FileHandler):
+        # 每条日志都整读整写一次文件是O(N²)；按条数摊销，隔一批才修剪
+        TRIM_EVERY = 200
+
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self._emit_count = 0
+
         def emit(self, record):
             super().emit(record)
+            self._emit_count += 1
+            if self._emit_count < self.TRIM_EVERY:
+                return
+            self._emit_count = 0
             try:
+                # 修剪用os.replace换文件inode，必须先关闭自己的流，
+                # 否则后续日志会写进已被替换下来的旧文件里丢失；
+                # FileHandler在下一次emit时会自动重新打开新文件
+                self.close()
                 trim_log_file(log_file, MAX_LOG_LINES)
             except Exception:
                 pass
@@ -199,7 +290,14 @@ def setup_logger():
     file_handler.setLevel(logging.INFO)
     file_handler.setFormatter(formatter)
 
-    logger.addHandler(file_handler)
+    # 内存缓冲批量落盘：INFO级记录攒一批写一次，WARNING及以上立即刷出
+    memory_handler = logging.handlers.MemoryHandler(
+        capacity=200, flushLevel=logging.WARNING,
+        target=file_handler, flushOnClose=True
+    )
+    logger.addHandler(memory_handler)
+    # 进程退出时确保缓冲里的日志落盘
+    atexit.register(memory_handler.flush)
     # 不加 console_handler
 
     print(f"日志文件路径: {log_file.resolve()}")
@@ -207,13 +305,35 @@ def setup_logger():
 
 logger = setup_logger()
 
+# 当日日志路径缓存：跨天才重新拼路径/建目录，高频拉日志时省去反复stat
+_log_path_cache = {"date": None, "path": None}
+
+def _current_log_path() -> Path:
+    today = time.strftime('%Y%m%d')
+    if _log_path_cache["date"] != today:
+        _log_path_cache["path"] = ensure_log_directory() / f"mcp_mysql_{today}.log"
+        _log_path_cache["date"] = today
+    return _log_path_cache["path"]
+
+def _tail_lines(path: str, max_lines: int) -> List[str]:
+    """从文件末尾按块回读最后max_lines行，I/O量与文件总大小无关"""
+    block = 8192
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        data = b''
+        while size > 0 and data.count(b'\n') <= max_lines:
+            read = min(block, size)
+            size -= read
+            f.seek(size)
+            data = f.read(read) + data
+    return data.decode('utf-8', errors='replace').splitlines()[-max_lines:]
+
 def read_log_file(path: str, max_lines: int = 100) -> List[Dict[str, str]]:
     if not os.path.exists(path):
         return []
     logs = []
-    with open(path, encoding='utf-8') as f:
-        lines = f.readlines()
-    lines = lines[-max_lines:]
+    lines = _tail_lines(path, max_lines)
     for line in reversed(lines):
         parts = line.strip().split(" - ")
         if len(parts) >= 4:
@@ -231,131 +351,349 @@ def read_log_file(path: str, max_lines: int = 100) -> List[Dict[str, str]]:
 # ----- 日志功能整合结束 -----
 
 
-def get_connection():
-    try:
-        return MySQLdb.connect(**DB_CONFIG)
-    except MySQLdb.Error as e:
-        logger.error(f"数据库连接失败: {e}")
-        raise
+# ----- 数据库连接池 -----
+POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", 2))  # 启动时预建的连接数
+POOL_MAX_SIZE = int(os.getenv("DB_POOL_SIZE", 5))  # 连接池最大连接数
+POOL_IDLE_TIMEOUT = int(os.getenv("DB_POOL_IDLE_TIMEOUT", 300))  # 空闲连接超时（秒）
+POOL_MAX_LIFETIME = int(os.getenv("DB_POOL_MAX_LIFETIME", 3600))  # 连接最长存活（秒），到期回收防止服务端wait_timeout踩坑
+POOL_CLEANUP_INTERVAL = 30  # 后台清理间隔（秒）
+
+class MySQLPool:
+    """线程安全的MySQL连接池，复用连接避免每次查询重新建立TCP+认证握手"""
+
+    def __init__(self, config: Dict[str, Any], max_size: int = POOL_MAX_SIZE,
+                 min_size: int = POOL_MIN_SIZE, idle_timeout: int = POOL_IDLE_TIMEOUT):
+        self.config = config
+        self.max_size = max_size
+        self.min_size = min(min_size, max_size)
+        self.idle_timeout = idle_timeout
+        self._idle = deque()  # 空闲连接，元素为 (connection, 归还时间)
+        self._lock = threading.Lock()
+        self._slots = threading.Semaphore(max_size)
+        # 启动时在后台预建少量连接，首批请求不用各自付握手开销
+        threading.Thread(target=self._prefill, daemon=True).start()
+        # 后台线程定期关闭超时的空闲连接
+        cleanup_thread = threading.Thread(target=self._cleanup_loop, daemon=True)
+        cleanup_thread.start()
+
+    def _prefill(self):
+        try:
+            warm = [self._new_connection() for _ in range(self.min_size)]
+        except MySQLdb.Error:
+            # 数据库暂不可达时跳过预热，后续请求按需重试建连
+            return
+        now = time.time()
+        with self._lock:
+            self._idle.extend((conn, now) for conn in warm)
+
+    def _new_connection(self):
+        try:
+            conn = MySQLdb.connect(**self.config)
+        except MySQLdb.Error as e:
+            logger.error(f"数据库连接失败: {e}")
+            raise
+        # 连接建立时一次性设为只读+自动提交，
+        # 每次查询不再花两个往返发 SET/START TRANSACTION
+        cur = conn.cursor()
+        try:
+            cur.execute("SET SESSION TRANSACTION READ ONLY")
+        finally:
+            cur.close()
+        conn.autocommit(True)
+        conn._pool_created_at = time.time()
+        return conn
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    @contextmanager
+    def acquire(self):
+        """取出一个连接，正常用完自动归还池中；出错则关闭丢弃"""
+        self._slots.acquire()
+        try:
+            conn = None
+            with self._lock:
+                if self._idle:
+                    conn, _ = self._idle.pop()
+            if conn is not None and time.time() - getattr(conn, "_pool_created_at", 0) > POOL_MAX_LIFETIME:
+                # 超龄连接主动回收，避免撞上MySQL服务端wait_timeout断连
+                self._close_quietly(conn)
+                conn = None
+            if conn is not None:
+                try:
+                    # 不开自动重连：重连后的新会话会丢掉建连时设置的
+                    # 会话级只读和autocommit，失效连接走下面的重建路径
+                    conn.ping(False)
+                except MySQLdb.Error:
+                    self._close_quietly(conn)
+                    conn = None
+            if conn is None:
+                conn = self._new_connection()
+            try:
+                yield conn
+            except Exception:
+                self._close_quietly(conn)
+                raise
+            else:
+                with self._lock:
+                    self._idle.append((conn, time.time()))
+        finally:
+            self._slots.release()
+
+    def _cleanup_loop(self):
+        while True:
+            time.sleep(POOL_CLEANUP_INTERVAL)
+            now = time.time()
+            with self._lock:
+                # 队列左端是最久未使用的连接
+                while self._idle and now - self._idle[0][1] > self.idle_timeout:
+                    conn, _ = self._idle.popleft()
+                    self._close_quietly(conn)
+
+pool = MySQLPool(DB_CONFIG)
+# ----- 数据库连接池结束 -----
+
+
+# ----- Schema缓存 -----
+SCHEMA_CACHE_TTL = 300  # 表结构缓存时间（秒）
+
+# 过期判断用monotonic时钟：比time.time()便宜，且不受系统时间回拨影响
+_schema_cache = {
+    "data": None,
+    "expires_at": 0.0
+}
+_schema_fetch_lock = threading.Lock()
+
+def _schema_cache_valid() -> bool:
+    return _schema_cache["data"] is not None and time.monotonic() < _schema_cache["expires_at"]
+
+# 表列表缓存：比整套schema轻，单独用更短的TTL
+TABLES_CACHE_TTL = 60
+_tables_cache = {"data": None, "expires_at": 0.0}
+
+def invalidate_schema_cache():
+    """主动失效表结构/表列表缓存（表结构变更后调用，无需等TTL过期）"""
+    _schema_cache["data"] = None
+    _schema_cache["expires_at"] = 0.0
+    _tables_cache["data"] = None
+    _tables_cache["expires_at"] = 0.0
+
+def get_schema_cached(force_refresh: bool = False) -> Dict[str, Any]:
+    """带TTL缓存的全量表结构；缓存失效时并发请求只有一个线程真正查库。
+
+    MySQL不会向本服务推送DDL变更通知，因此以主动失效（force_refresh /
+    invalidate_schema_cache）为主、TTL过期为兜底。
+    """
+    if not force_refresh and _schema_cache_valid():
+        return _schema_cache["data"]
+    with _schema_fetch_lock:
+        # 双重检查：等锁期间可能已有线程完成拉取
+        if not force_refresh and _schema_cache_valid():
+            return _schema_cache["data"]
+        data = get_schema_filtered()
+        _schema_cache["data"] = data
+        _schema_cache["expires_at"] = time.monotonic() + SCHEMA_CACHE_TTL
+        return data
+# ----- Schema缓存结束 -----
 
 
 @mcp.resource("mysql://schema")
 def get_schema() -> Dict[str, Any]:
     """提供数据库表结构信息（全部表）"""
-    return get_schema_filtered()
+    return get_schema_cached()
 
 def get_schema_filtered(table_name: str = None) -> Dict[str, Any]:
     """提供数据库表结构信息，支持按表名过滤（仅本地/测试用）"""
-    conn = get_connection()
-    cursor = None
-    try:
-        cursor = conn.cursor(MySQLdb.cursors.DictCursor)
-        cursor.execute("SHOW TABLES")
-        tables = cursor.fetchall()
-        table_names = [list(table.values())[0] for table in tables]
-        schema = {}
-        for tname in table_names:
-            if table_name and tname != table_name:
-                continue
-            cursor.execute(f"DESCRIBE `{tname}`")
-            columns = cursor.fetchall()
-            table_schema = []
-            for column in columns:
-                table_schema.append({
-                    "name": column["Field"],
-                    "type": column["Type"],
-                    "null": column["Null"],
-                    "key": column["Key"],
-                    "default": column["Default"],
-                    "extra": column["Extra"]
+    with pool.acquire() as conn:
+        # 元组游标：列固定且行数多（每字段一行），不必逐行建dict
+        cursor = conn.cursor()
+        try:
+            # 一条SQL取回所有表的字段信息，避免每张表一次DESCRIBE的N+1往返；
+            # 指定表名时过滤下推到WHERE，只传回需要的行
+            sql = (
+                "SELECT TABLE_NAME, COLUMN_NAME, COLUMN_TYPE, IS_NULLABLE, "
+                "COLUMN_KEY, COLUMN_DEFAULT, EXTRA "
+                "FROM information_schema.COLUMNS "
+                "WHERE TABLE_SCHEMA = %s "
+            )
+            args = [DB_CONFIG["db"]]
+            if table_name:
+                sql += "AND TABLE_NAME = %s "
+                args.append(table_name)
+            sql += "ORDER BY TABLE_NAME, ORDINAL_POSITION"
+            cursor.execute(sql, tuple(args))
+            rows = cursor.fetchall()
+            schema = {}
+            for tname, col_name, col_type, nullable, key, default, extra in rows:
+                schema.setdefault(tname, []).append({
+                    "name": col_name,
+                    "type": col_type,
+                    "null": nullable,
+                    "key": key,
+                    "default": default,
+                    "extra": extra
                 })
-            schema[tname] = table_schema
-        return {
-            "database": DB_CONFIG["db"],
-            "tables": schema
-        }
-    finally:
-        if cursor:
+            return {
+                "database": DB_CONFIG["db"],
+                "tables": schema
+            }
+        finally:
             cursor.close()
-        conn.close()
 
 
+# 只读语句前缀白名单，模块加载时编译一次，避免每次查询重复构造正则
+_ALLOWED_PREFIX_RE = re.compile(r"^(?:select|show|desc|describe|explain)(?:\s|\(|\*|\b)")
+# 常见写法（关键字后跟空格）直接用C层startswith判定，不进正则引擎
+_SAFE_PREFIX_FAST = ('select ', 'show ', 'desc ', 'describe ', 'explain ')
+
+# 危险关键字单次扫描；\b词边界避免 created_at / dropoff_time 这类列名误杀
+_DANGEROUS_KEYWORD_RE = re.compile(
+    r"\b(?:insert|update|delete|drop|create|alter|"
+    r"truncate|replace|merge|call|exec|execute)\b"
+)
+
 def is_safe_query(sql: str) -> bool:
     sql_lower = sql.lstrip().lower()
-    allowed_prefixes = ["select", "show", "desc", "describe", "explain"]
-    for prefix in allowed_prefixes:
-        if re.match(rf"^{prefix}(\s|\(|\*|\b)", sql_lower):
-            break
-    else:
+    if not (sql_lower.startswith(_SAFE_PREFIX_FAST) or _ALLOWED_PREFIX_RE.match(sql_lower)):
         return False
-    dangerous_keywords = [
-        'insert', 'update', 'delete', 'drop', 'create', 'alter',
-        'truncate', 'replace', 'merge', 'call', 'exec', 'execute'
-    ]
-    if any(keyword in sql_lower for keyword in dangerous_keywords):
+    if _DANGEROUS_KEYWORD_RE.search(sql_lower):
         return False
     return True
 
+# ----- 下一页预取 -----
+# 单槽预取缓存：翻页请求到来前由后台线程填充，命中则省掉整个DB往返
+_prefetch_state = {"sql": "", "page": -1, "page_size": 0, "rows": None}
+_prefetch_lock = threading.Lock()
+
+def _prefetch_next_page(base_sql: str, page: int, page_size: int):
+    """起后台线程预取指定页，利用用户的阅读时间隐藏查询延迟"""
+    def work():
+        try:
+            with pool.acquire() as conn:
+                cursor = conn.cursor(MySQLdb.cursors.DictCursor)
+                try:
+                    cursor.execute(f"{base_sql} LIMIT %s OFFSET %s", (page_size, page * page_size))
+                    rows = cursor.fetchall()
+                finally:
+                    cursor.close()
+            with _prefetch_lock:
+                _prefetch_state.update({"sql": base_sql, "page": page, "page_size": page_size, "rows": rows})
+        except Exception as e:
+            logger.warning("预取下一页失败: %s", e)
+
+    threading.Thread(target=work, daemon=True).start()
+
+def _take_prefetched(base_sql: str, page: int, page_size: int):
+    """取出命中的预取页；未命中返回None"""
+    with _prefetch_lock:
+        if (_prefetch_state["rows"] is not None
+                and _prefetch_state["sql"] == base_sql
+                and _prefetch_state["page"] == page
+                and _prefetch_state["page_size"] == page_size):
+            rows = _prefetch_state["rows"]
+            _prefetch_state["rows"] = None
+            return rows
+    return None
+# ----- 下一页预取结束 -----
+
+def _load_page(page: int) -> Dict[str, Any]:
+    """读取上一条查询的指定页：可分页SELECT重新下发LIMIT/OFFSET，其余切片缓存结果"""
+    # 锁内一次性取出状态快照，后续DB往返不持锁
+    with _pagination_lock:
+        page_size = pagination_state["page_size"]
+        last_results = pagination_state["last_results"]
+        base_sql = pagination_state["last_sql_raw"].rstrip(';')
+        total_rows = pagination_state["total_rows"]
+    if last_results is not None:
+        return get_page_data(last_results, page, page_size)
+
+    rows = _take_prefetched(base_sql, page, page_size)
+    if rows is None:
+        with pool.acquire() as conn:
+            cursor = conn.cursor(MySQLdb.cursors.DictCursor)
+            try:
+                cursor.execute(f"{base_sql} LIMIT %s OFFSET %s", (page_size, page * page_size))
+                rows = cursor.fetchall()
+            finally:
+                cursor.close()
+    return {
+        "data": rows,
+        "pagination": make_pagination_info(page, page_size, total_rows, len(rows))
+    }
+
 @mcp.tool()
 def next_page() -> Dict[str, Any]:
     """获取下一页数据"""
-    if not pagination_state["last_results"]:
+    # 锁内取一致的状态快照，避免与并发查询交错读到混搭的值
+    with _pagination_lock:
+        last_sql = pagination_state["last_sql"]
+        current_page = pagination_state["current_page"]
+        page_size = pagination_state["page_size"]
+        total_rows = pagination_state["total_rows"]
+        results_cached = pagination_state["last_results"] is not None
+        base_sql = pagination_state["last_sql_raw"].rstrip(';')
+
+    if not last_sql:
         return {
             "success": False,
             "error": "No previous query results to paginate"
         }
-    
-    current_page = pagination_state["current_page"]
-    page_info = get_page_data(
-        pagination_state["last_results"], 
-        current_page + 1, 
-        pagination_state["page_size"]
-    )
-    
-    # 修复逻辑错误：检查是否有下一页
-    if not page_info["pagination"]["has_next"]:
+
+    total_pages = (total_rows + page_size - 1) // page_size if total_rows > 0 else 0
+
+    if current_page + 1 >= total_pages:
         return {
             "success": False,
             "error": "Already at the last page"
         }
-    
-    pagination_state["current_page"] = current_page + 1
-    
-    logger.info(f"获取下一页: 第{pagination_state['current_page'] + 1}页")
-    
+
+    page_info = _load_page(current_page + 1)
+    with _pagination_lock:
+        pagination_state["current_page"] = current_page + 1
+
+    # 上一次预取已消费，继续预取再下一页
+    if not results_cached and page_info["pagination"]["has_next"]:
+        _prefetch_next_page(base_sql, current_page + 2, page_size)
+
+    logger.info("获取下一页: 第%d页", current_page + 2)
+
     return {
         "success": True,
         "results": page_info["data"],
         "rowCount": len(page_info["data"]),
-        "totalRows": pagination_state["total_rows"],
+        "totalRows": total_rows,
         "pagination": page_info["pagination"]
     }
 
 @mcp.tool()
 def prev_page() -> Dict[str, Any]:
     """获取上一页数据"""
-    if not pagination_state["last_results"]:
+    with _pagination_lock:
+        last_sql = pagination_state["last_sql"]
+        current_page = pagination_state["current_page"]
+
+    if not last_sql:
         return {
             "success": False,
             "error": "No previous query results to paginate"
         }
-    
-    current_page = pagination_state["current_page"]
+
     if current_page <= 0:
         return {
             "success": False,
             "error": "Already at the first page"
         }
-    
-    pagination_state["current_page"] = current_page - 1
-    page_info = get_page_data(
-        pagination_state["last_results"], 
-        pagination_state["current_page"], 
-        pagination_state["page_size"]
-    )
-    
-    logger.info(f"获取上一页: 第{pagination_state['current_page'] + 1}页")
-    
+
+    page_info = _load_page(current_page - 1)
+    with _pagination_lock:
+        pagination_state["current_page"] = current_page - 1
+
+    logger.info("获取上一页: 第%d页", current_page)
+
     return {
         "success": True,
         "results": page_info["data"],
@@ -363,46 +701,54 @@ def prev_page() -> Dict[str, Any]:
         "pagination": page_info["pagination"]
     }
 
-def contains_sensitive_field(sql: str) -> bool:
-    sql_lower = sql.lower()
-    for field in SENSITIVE_FIELDS:
-        # 匹配字段名，防止误判
-        if re.search(r'\b' + re.escape(field.lower()) + r'\b', sql_lower):
-            return True
-    return False
+# 敏感字段合并成一个词边界交替正则，模块加载时编译一次
+_SENSITIVE_RE = re.compile(
+    "|".join(r'\b' + re.escape(field.lower()) + r'\b' for field in SENSITIVE_FIELDS)
+)
 
-def is_sql_injection(sql: str) -> bool:
-    """
-    简易 SQL 注入检测。
-    利用 libinjection 库和常见注入特征模式，拦截明显的拼接注入或关键词注入攻击。
-    返回 True 表示检测到注入风险，False 表示未检测到。
-    """
-    sql_lower = sql.strip().lower()
+def contains_sensitive_field(sql: str) -> bool:
+    return _SENSITIVE_RE.search(sql.lower()) is not None
+
+# 常见注入特征，模块加载时合并编译成单个交替正则，调用时只做一次C层扫描
+_INJECTION_PATTERNS = [
+    r'or\s*1\s*=\s*1',
+    r'union\s+select',
+    r';\s*drop\s+',
+    r';\s*insert\s+',
+    r';\s*update\s+',
+    r';\s*delete\s+',
+    r'and\s+sleep\s*\(',
+    r'benchmark\s*\(',
+    r'and\s*\(\s*select',
+    r'and\s+exists\s*\(',
+    r'and\s*\(\s*1\s*=\s*1',
+    r'or\s*\(\s*1\s*=\s*1',
+    r'or\s*1\s*=\s*1--',
+    r'or\s*1\s*=\s*1#',
+    # 可继续补充
+]
+_INJECTION_RE = re.compile("|".join(f"(?:{p})" for p in _INJECTION_PATTERNS))
+
+# 注入特征绕不开的字符：引号、注释、语句分隔符，以及恒真式的等号和
+# 函数调用的左括号（or 1=1 / sleep( / benchmark( 等都依赖后两者）。
+# 一条SQL里这些字符一个都没有（结尾分号除外）且不含union时，
+# _INJECTION_PATTERNS里的任何模式都不可能命中，可以直接放行
+_SUSPICIOUS_CHARS = frozenset("'\";-/*=(")
+
+def _check_sql_injection(sql: str, sql_lower: str) -> bool:
+    """注入检测内部实现，接收调用方已小写化的SQL避免重复转换"""
+    # 干净SQL快路径：绝大多数生成的SELECT只需这一趟字符扫描，
+    # 省掉每次libinjection的FFI调用开销
+    body = sql_lower.rstrip().rstrip(';')
+    if "union" not in body and not any(c in _SUSPICIOUS_CHARS for c in body):
+        return False
     try:
         # 1. 使用 libinjection 库检测
         result = libinjection.is_sql_injection(sql)
         if result.get('is_sqli', False):
-            # 2. 进一步用正则检测常见注入特征
-            injection_patterns = [
-                r'or\s*1\s*=\s*1',
-                r'union\s+select',
-                r';\s*drop\s+',
-                r';\s*insert\s+',
-                r';\s*update\s+',
-                r';\s*delete\s+',
-                r'and\s+sleep\s*\(',
-                r'benchmark\s*\(',
-                r'and\s*\(\s*select',
-                r'and\s+exists\s*\(',
-                r'and\s*\(\s*1\s*=\s*1',
-                r'or\s*\(\s*1\s*=\s*1',
-                r'or\s*1\s*=\s*1--',
-                r'or\s*1\s*=\s*1#',
-                # 可继续补充
-            ]
-            for pattern in injection_patterns:
-                if re.search(pattern, sql_lower):
-                    return True
+            # 2. 进一步用预编译的合并正则检测常见注入特征，一趟扫描
+            if _INJECTION_RE.search(sql_lower):
+                return True
             # 没有明显注入特征，放行
             return False
         return False
@@ -410,185 +756,317 @@ def is_sql_injection(sql: str) -> bool:
         logger.warning(f"SQL注入检测失败: {e}")
         return False
 
+def is_sql_injection(sql: str) -> bool:
+    """
+    简易 SQL 注入检测。
+    利用 libinjection 库和常见注入特征模式，拦截明显的拼接注入或关键词注入攻击。
+    返回 True 表示检测到注入风险，False 表示未检测到。
+    """
+    return _check_sql_injection(sql, sql.strip().lower())
+
+@lru_cache(maxsize=256)
+def validate_sql(sql: str):
+    """对SQL做全部安全校验，返回拒绝原因字符串；通过则返回None。
+
+    三项校验融合为一次小写化后的多次C层扫描：不再各自lstrip/lower
+    整条SQL，libinjection也只调用一次。校验结果只取决于SQL文本本身，
+    结果做LRU缓存：同一条SQL反复执行（翻页、LLM重试、多轮追问）时
+    跳过全部扫描。
+    """
+    sql_lower = sql.lstrip().lower()
+    if not (sql_lower.startswith(_SAFE_PREFIX_FAST) or _ALLOWED_PREFIX_RE.match(sql_lower)):
+        return "只允许只读查询（SELECT）"
+    if _DANGEROUS_KEYWORD_RE.search(sql_lower):
+        return "只允许只读查询（SELECT）"
+    if _check_sql_injection(sql, sql_lower):
+        return "检测到疑似SQL注入，已拒绝执行"
+    if _SENSITIVE_RE.search(sql_lower):
+        return "查询包含敏感字段，已拒绝执行"
+    return None
+
+
+def _error_result(error: str, session: ConversationSession, sql: str, user_message: str,
+                  now: float = None) -> Dict[str, Any]:
+    """构造统一的失败结果并记入会话上下文（query_data各失败分支共用）"""
+    result = {
+        "success": False,
+        "error": error
+    }
+    logger.debug("返回错误结果: %s", result)
+    session.add_context(sql, result, user_message, now)
+    return result
+
+
 @mcp.tool()
 def query_data(sql: str, page: int = 0, page_size: int = 50, session_id: str = "default", user_message: str = "") -> Dict[str, Any]:
     """执行只读SQL查询，支持分页和多轮对话上下文"""
-    timestamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
+    # 服务端兜底限制页大小，旧客户端传超大page_size时不再整表物化
+    if page_size > MAX_PAGE_SIZE:
+        page_size = MAX_PAGE_SIZE
+    if page < 0:
+        page = 0
+    # 整个请求共用一个时间戳，避免多处重复取系统时间
+    now = time.time()
+    timestamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(now))
     logger.info("=== 新的SQL查询开始 ===")
-    logger.info(f"时间戳: {timestamp}")
-    logger.info(f"会话ID: {session_id}")
-    logger.info(f"SQL语句: {sql}")
-    logger.info(f"用户消息: {user_message}")
-    logger.info(f"请求页码: {page}, 页大小: {page_size}")
-
-    # 清理过期会话
-    cleanup_expired_sessions()
-    
+    logger.info("SQL语句: %s", sql)
+    # 其余请求细节降到debug，正常运行时不为每次查询写多行日志
+    logger.debug("时间戳: %s, 会话ID: %s", timestamp, session_id)
+    logger.debug("用户消息: %s", user_message)
+    logger.debug("请求页码: %s, 页大小: %s", page, page_size)
+
+    # 过期会话由后台线程定期清理，请求路径不做全量扫描
     # 获取或创建会话
     session = get_or_create_session(session_id)
 
-    # 只读 SQL 白名单过滤
-    if not is_safe_query(sql):
-        logger.warning(f"不安全查询被拒绝: {sql}")
-        logger.info("=== SQL查询结束（不安全） ===")
-        result = {
-            "success": False,
-            "error": "只允许只读查询（SELECT）"
-        }
-        logger.info(f"返回结果: {result}")
-        # 记录到上下文
-        session.add_context(sql, result, user_message)
-        return result
-
-    # SQL 注入检测
-    if is_sql_injection(sql):
-        logger.warning(f"检测到疑似SQL注入被拒绝: {sql}")
-        result = {
-            "success": False,
-            "error": "检测到疑似SQL注入，已拒绝执行"
-        }
-        # 记录到上下文
-        session.add_context(sql, result, user_message)
-        return result
-
-    # 敏感字段检测
-    if contains_sensitive_field(sql):
-        logger.warning(f"查询包含敏感字段被拒绝: {sql}")
-        result = {
-            "success": False,
-            "error": "查询包含敏感字段，已拒绝执行"
-        }
-        # 记录到上下文
-        session.add_context(sql, result, user_message)
-        return result
+    # 安全校验：只读白名单 / SQL注入 / 敏感字段（结果按SQL文本缓存）
+    reject_reason = validate_sql(sql)
+    if reject_reason is not None:
+        logger.warning("查询被拒绝: %s (%s)", sql, reject_reason)
+        logger.info("=== SQL查询结束（校验未通过） ===")
+        return _error_result(reject_reason, session, sql, user_message, now)
 
     try:
         # 如果是新查询，重置分页状态
-        # 安全获取last_sql，确保不是None
-        last_sql = pagination_state.get("last_sql") or ""
-        if sql.strip().lower() != last_sql.strip().lower():
-            reset_pagination()
-            pagination_state["last_sql"] = sql.strip().lower()
-            pagination_state["page_size"] = page_size
-            logger.info("重置分页状态，这是新查询")
-        else:
-            # 如果是同一个查询但指定了不同的页码，更新当前页
-            pagination_state["current_page"] = page
-            logger.info(f"相同查询，更新页码到: {page}")
+        # last_sql存入时已strip+lower，这里只归一化本次SQL一次
+        sql_stripped = sql.strip()
+        sql_norm = sql_stripped.lower()
+        with _pagination_lock:
+            if sql_norm != (pagination_state.get("last_sql") or ""):
+                reset_pagination()
+                pagination_state["last_sql"] = sql_norm
+                pagination_state["last_sql_raw"] = sql_stripped
+                pagination_state["page_size"] = page_size
+                logger.debug("重置分页状态，这是新查询")
+            else:
+                # 如果是同一个查询但指定了不同的页码，更新当前页
+                pagination_state["current_page"] = page
+                logger.debug("相同查询，更新页码到: %s", page)
 
-        conn = None
-        cursor = None
         try:
-            conn = get_connection()
-            logger.info("数据库连接成功")
+            with pool.acquire() as conn:
+                logger.debug("数据库连接成功")
+                result = _execute_query(conn, sql, page, page_size, session, user_message, now)
+            return result
 
-            cursor = conn.cursor(MySQLdb.cursors.DictCursor)
-            cursor.execute("SET TRANSACTION READ ONLY")
-            cursor.execute("START TRANSACTION")
-            logger.info("只读事务开始")
+        except Exception as e:
+            logger.error("数据库连接或操作错误: %s", e)
+            logger.info("=== SQL查询结束（连接失败） ===")
+            return _error_result(str(e), session, sql, user_message, now)
 
-            try:
-                cursor.execute(sql)
-                results = cursor.fetchall()
-                conn.commit()
+    except Exception as e:
+        logger.error("query_data函数异常: %s", e)
+        return _error_result(f"Internal error: {str(e)}", session, sql, user_message, now)
 
-                logger.info("查询执行成功")
-                logger.info(f"返回总行数: {len(results)}")
 
-                # 保存完整结果用于分页
-                pagination_state["last_results"] = results
-                pagination_state["total_rows"] = len(results)
+_LIMIT_CLAUSE_RE = re.compile(r'\blimit\b', re.IGNORECASE)
 
-                # 获取当前页数据
-                page_info = get_page_data(results, page, page_size)
+def _is_pageable_select(sql: str) -> bool:
+    """判断SQL是否可以追加LIMIT/OFFSET做服务端分页"""
+    stripped = sql.strip().rstrip(';').lower()
+    if not stripped.startswith("select"):
+        return False
+    # 已带LIMIT或包含多条语句的查询按原样执行
+    if _LIMIT_CLAUSE_RE.search(stripped) or ";" in stripped:
+        return False
+    return True
 
-                logger.info(f"分页信息: 第{page + 1}页，共{page_info['pagination']['total_pages']}页，显示行 {page_info['pagination']['showing_rows']}")
-                
-                result = {
-                    "success": True,
-                    "results": page_info["data"],
-                    "rowCount": len(page_info["data"]),
-                    "totalRows": page_info["pagination"]["total_rows"],
-                    "pagination": page_info["pagination"]
-                }
-                
-                logger.info("=== SQL查询结束 ===")
-                logger.info(f"返回结果长度: {len(str(result))}")
-                # 记录到上下文
-                session.add_context(sql, result, user_message)
-                return result
-                
-            except Exception as e:
-                conn.rollback()
-                logger.error(f"SQL执行错误: {str(e)}")
-                logger.info("=== SQL查询结束（SQL执行失败） ===")
-                result = {
-                    "success": False,
-                    "error": str(e)
+
+STREAM_CHUNK_SIZE = 1000  # 流式读取时每批行数
+STREAM_PAGE_THRESHOLD = 1000  # 页大小超过该值时改用流式游标
+MAX_PAGE_SIZE = 10000  # 单页最大行数，超出按此值截断
+
+def _fetch_streaming(conn, sql: str, args=None) -> List[Dict[str, Any]]:
+    """用服务端流式游标(SSDictCursor)分批取数。
+
+    默认的缓冲游标会在客户端一次性复制整个结果集，大查询时内存翻倍、
+    首行延迟等于全量耗时；流式游标按STREAM_CHUNK_SIZE批次拉取。
+    行以元组传输，列名取自cursor.description共享一份，最后才组装dict，
+    比SSDictCursor逐行建哈希表省CPU。
+    """
+    cursor = conn.cursor(MySQLdb.cursors.SSCursor)
+    try:
+        if args:
+            cursor.execute(sql, args)
+        else:
+            cursor.execute(sql)
+        columns = tuple(d[0] for d in cursor.description)
+        rows = []
+        while True:
+            chunk = cursor.fetchmany(STREAM_CHUNK_SIZE)
+            if not chunk:
+                break
+            rows.extend(dict(zip(columns, row)) for row in chunk)
+        return rows
+    finally:
+        cursor.close()
+
+
+def _run_query_sync(cursor, sql: str) -> List[Dict[str, Any]]:
+    """执行单条SQL并取回全部行。
+
+    纯阻塞调用，供工作线程使用：FastMCP 在线程池里运行同步工具，
+    Flask 每个请求一个线程，因此阻塞的驱动调用不会卡住事件循环。
+    """
+    cursor.execute(sql)
+    return cursor.fetchall()
+
+
+def _execute_query(conn, sql: str, page: int, page_size: int, session: ConversationSession,
+                   user_message: str, now: float = None) -> Dict[str, Any]:
+    """在给定连接上执行查询并组装分页结果"""
+    sql_norm = sql.strip().lower()  # 与pagination_state["last_sql"]的归一化口径一致
+    cursor = conn.cursor(MySQLdb.cursors.DictCursor)
+    try:
+        # 连接在池中已设为会话级只读+自动提交，无需逐查询开只读事务
+        try:
+            if _is_pageable_select(sql):
+                # 服务端分页：LIMIT/OFFSET只取当前页
+                base_sql = sql.strip().rstrip(';')
+                # 先查单槽预取缓存：CLI/Streamlit都是带页码经/query翻页，
+                # 命中时直接复用后台预取的行，不再重复下发同一页查询
+                page_rows = _take_prefetched(base_sql, page, page_size)
+                if page_rows is None:
+                    if page_size > STREAM_PAGE_THRESHOLD:
+                        # 大页请求用流式游标，避免客户端整页双重缓冲
+                        page_rows = _fetch_streaming(conn, f"{base_sql} LIMIT %s OFFSET %s",
+                                                     (page_size, page * page_size))
+                    else:
+                        cursor.execute(f"{base_sql} LIMIT %s OFFSET %s", (page_size, page * page_size))
+                        page_rows = cursor.fetchall()
+                # 复用缓存总数前先在锁内核对last_sql：threaded下两条查询
+                # 交错时不能把查询A的总数套到查询B头上
+                with _pagination_lock:
+                    cached_total = (pagination_state["total_rows"]
+                                    if (pagination_state["last_sql"] == sql_norm
+                                        and pagination_state["last_results"] is None)
+                                    else 0)
+                # 当前页未填满时总行数可直接推算，省掉一次COUNT往返；
+                # 同一SQL翻页时复用上次算出的总数；只有整页填满的新查询
+                # 才真正发COUNT确定总数
+                if len(page_rows) < page_size and (page == 0 or page_rows):
+                    total_rows = page * page_size + len(page_rows)
+                elif cached_total:
+                    total_rows = cached_total
+                else:
+                    cursor.execute(f"SELECT COUNT(*) AS _total FROM ({base_sql}) AS _paged")
+                    total_rows = cursor.fetchall()[0]["_total"]
+
+                logger.info("查询执行成功，总行数: %s", total_rows)
+
+                # 写回同样核对last_sql：查询期间若有新SQL重置了状态，
+                # 本次的总数不再属于当前状态，直接丢弃
+                with _pagination_lock:
+                    if pagination_state["last_sql"] == sql_norm:
+                        pagination_state["last_results"] = None
+                        pagination_state["total_rows"] = total_rows
+                page_info = {
+                    "data": page_rows,
+                    "pagination": make_pagination_info(page, page_size, total_rows, len(page_rows))
                 }
-                logger.info(f"返回错误结果: {result}")
-                # 记录到上下文
-                session.add_context(sql, result, user_message)
-                return result
-                
-        except Exception as e:
-            logger.error(f"数据库连接或操作错误: {str(e)}")
-            logger.info("=== SQL查询结束（连接失败） ===")
+                # 还有下一页时后台预取，用户翻页时直接命中
+                if page_info["pagination"]["has_next"] and page_size <= STREAM_PAGE_THRESHOLD:
+                    _prefetch_next_page(base_sql, page + 1, page_size)
+            else:
+                # SHOW/DESC等语句无法追加LIMIT，退回缓存完整结果再切片
+                results = _run_query_sync(cursor, sql)
+
+                logger.info("查询执行成功，总行数: %s", len(results))
+
+                with _pagination_lock:
+                    if pagination_state["last_sql"] == sql_norm:
+                        pagination_state["last_results"] = results
+                        pagination_state["total_rows"] = len(results)
+                page_info = get_page_data(results, page, page_size)
+
+            logger.debug("分页信息: 第%d页，共%s页，显示行 %s", page + 1,
+                        page_info['pagination']['total_pages'], page_info['pagination']['showing_rows'])
+
             result = {
-                "success": False,
-                "error": str(e)
+                "success": True,
+                "results": page_info["data"],
+                "rowCount": len(page_info["data"]),
+                "totalRows": page_info["pagination"]["total_rows"],
+                "pagination": page_info["pagination"]
             }
-            logger.info(f"返回连接错误结果: {result}")
+
+            logger.info("=== SQL查询结束 ===")
+            logger.debug("返回行数: %s", len(page_info["data"]))
             # 记录到上下文
-            session.add_context(sql, result, user_message)
+            session.add_context(sql, result, user_message, now)
             return result
-            
-        finally:
-            if cursor:
+
+        except Exception as e:
+            logger.error("SQL执行错误: %s", e)
+            logger.info("=== SQL查询结束（SQL执行失败） ===")
+            return _error_result(str(e), session, sql, user_message, now)
+
+    finally:
+        cursor.close()
+
+
+@mcp.tool()
+def query_batch(sqls: List[str], page_size: int = 50) -> Dict[str, Any]:
+    """在同一连接上批量执行多条只读SQL。
+
+    相比逐条调用query_data，批量执行只取一次连接、只走一次往返，
+    适合需要同时发多条小查询的调用方。每条SQL独立校验、独立返回结果，
+    不影响分页状态和会话上下文。
+    """
+    logger.info("批量查询开始，共%d条SQL", len(sqls))
+    batch_results = []
+    with pool.acquire() as conn:
+        for sql in sqls:
+            reject_reason = validate_sql(sql)
+            if reject_reason is not None:
+                batch_results.append({"success": False, "sql": sql, "error": reject_reason})
+                continue
+            cursor = conn.cursor(MySQLdb.cursors.DictCursor)
+            try:
+                if _is_pageable_select(sql):
+                    cursor.execute(f"{sql.strip().rstrip(';')} LIMIT %s", (page_size,))
+                else:
+                    cursor.execute(sql)
+                rows = cursor.fetchall()
+                batch_results.append({"success": True, "sql": sql, "results": rows, "rowCount": len(rows)})
+            except Exception as e:
+                logger.error("批量查询中SQL执行错误: %s", e)
+                batch_results.append({"success": False, "sql": sql, "error": str(e)})
+            finally:
                 cursor.close()
-            if conn:
-                conn.close()
-            logger.info("数据库连接已关闭")
-            
-    except Exception as e:
-        logger.error(f"query_data函数异常: {str(e)}")
-        result = {
-            "success": False,
-            "error": f"Internal error: {str(e)}"
-        }
-        logger.info(f"返回异常结果: {result}")
-        # 记录到上下文
-        session.add_context(sql, result, user_message)
-        return result
+    return {
+        "success": True,
+        "results": batch_results,
+        "total": len(batch_results)
+    }
 
 
 @mcp.resource("mysql://tables")
 def get_tables() -> Dict[str, Any]:
-    """提供数据库表列表"""
-    conn = get_connection()
-    cursor = None
-    try:
-        cursor = conn.cursor(MySQLdb.cursors.DictCursor)
-
-        cursor.execute("SHOW TABLES")
-        tables = cursor.fetchall()
-        table_names = [list(table.values())[0] for table in tables]
+    """提供数据库表列表（带短TTL缓存，表列表极少变化）"""
+    if _tables_cache["data"] is not None and time.monotonic() < _tables_cache["expires_at"]:
+        return _tables_cache["data"]
+    with pool.acquire() as conn:
+        # 元组游标：SHOW TABLES单列结果直接取row[0]，免去每行dict+临时list
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SHOW TABLES")
+            table_names = [row[0] for row in cursor.fetchall()]
 
-        return {
-            "database": DB_CONFIG["db"],
-            "tables": table_names
-        }
-    finally:
-        if cursor:
+            data = {
+                "database": DB_CONFIG["db"],
+                "tables": table_names
+            }
+            _tables_cache["data"] = data
+            _tables_cache["expires_at"] = time.monotonic() + TABLES_CACHE_TTL
+            return data
+        finally:
             cursor.close()
-        conn.close()
 
 
 @mcp.resource("mysql://logs")
 def get_logs() -> Dict[str, Any]:
-    log_dir = ensure_log_directory()
-    log_file = log_dir / f"mcp_mysql_{time.strftime('%Y%m%d')}.log"
-    recent_logs = read_log_file(str(log_file), max_lines=100)
+    recent_logs = read_log_file(str(_current_log_path()), max_lines=100)
     return {
         "count": len(recent_logs),
         "logs": recent_logs
@@ -598,15 +1076,15 @@ def get_logs() -> Dict[str, Any]:
 @mcp.tool()
 def get_conversation_context(session_id: str = "default") -> Dict[str, Any]:
     """获取指定会话的上下文信息"""
-    cleanup_expired_sessions()
-    
-    if session_id not in conversation_sessions:
+    # 单次加锁查找：后台清理线程可能随时删除会话，先in后取会有竞态
+    with _sessions_lock:
+        session = conversation_sessions.get(session_id)
+    if session is None:
         return {
             "success": False,
             "error": f"会话 {session_id} 不存在"
         }
-    
-    session = conversation_sessions[session_id]
+
     return {
         "success": True,
         "context": session.get_context_summary()
@@ -616,8 +1094,9 @@ def get_conversation_context(session_id: str = "default") -> Dict[str, Any]:
 @mcp.tool()
 def clear_conversation_context(session_id: str = "default") -> Dict[str, Any]:
     """清理指定会话的上下文"""
-    if session_id in conversation_sessions:
-        del conversation_sessions[session_id]
+    with _sessions_lock:
+        existed = conversation_sessions.pop(session_id, None) is not None
+    if existed:
         logger.info(f"清理会话上下文: {session_id}")
         return {
             "success": True,
@@ -633,17 +1112,16 @@ def clear_conversation_context(session_id: str = "default") -> Dict[str, Any]:
 @mcp.tool()
 def list_active_sessions() -> Dict[str, Any]:
     """列出所有活跃的会话"""
-    cleanup_expired_sessions()
-    
     active_sessions = []
-    for session_id, session in conversation_sessions.items():
-        active_sessions.append({
-            "session_id": session_id,
-            "context_length": len(session.context),
-            "last_activity": session.last_activity,
-            "metadata": session.metadata
-        })
-    
+    with _sessions_lock:
+        for session_id, session in conversation_sessions.items():
+            active_sessions.append({
+                "session_id": session_id,
+                "context_length": len(session.context),
+                "last_activity": session.last_activity,
+                "metadata": session.metadata
+            })
+
     return {
         "success": True,
         "active_sessions": active_sessions,
@@ -661,8 +1139,19 @@ def validate_config():
         logger.warning("将使用默认值，生产环境可能无法正常工作。")
 
 
+def _warm_schema_cache():
+    """启动时后台预热表结构缓存，首个请求不用等information_schema查询"""
+    try:
+        get_schema_cached()
+        logger.info("表结构缓存预热完成")
+    except Exception as e:
+        # 预热失败不影响启动，首个/schema请求会再试
+        logger.warning("表结构缓存预热失败: %s", e)
+
+
 def main():
     validate_config()
+    threading.Thread(target=_warm_schema_cache, daemon=True).start()
     print(f"MySQL MCP服务器启动，连接到 {DB_CONFIG['host']}:{DB_CONFIG['port']}/{DB_CONFIG['db']}")
 
 
@@ -675,6 +1164,24 @@ try:
     from flask import Flask, request, jsonify
     app = Flask(__name__)
 
+    # 可选用orjson序列化响应，大结果集比标准json快数倍；未安装则用默认实现
+    try:
+        import orjson
+        from flask.json.provider import JSONProvider
+
+        class OrjsonProvider(JSONProvider):
+            def dumps(self, obj, **kwargs) -> str:
+                # default=str兜底Decimal/timedelta等DB驱动返回的类型，
+                # 与Flask默认Provider的行为对齐
+                return orjson.dumps(obj, default=str).decode()
+
+            def loads(self, s, **kwargs):
+                return orjson.loads(s)
+
+        app.json = OrjsonProvider(app)
+    except ImportError:
+        pass
+
     @app.route('/query', methods=['POST'])
     def http_query():
         data = request.json
@@ -684,18 +1191,32 @@ try:
         session_id = data.get('session_id', 'default')
         user_message = data.get('user_message', '')
         result = query_data(sql, page, page_size, session_id, user_message)
+        # 可选随查询结果一并返回表结构，省去客户端单独的 /schema 往返
+        if data.get('include_schema'):
+            result["schema"] = get_schema_cached()
         return jsonify(result)
 
+    @app.route('/batch_query', methods=['POST'])
+    def http_batch_query():
+        data = request.json
+        sqls = data.get('sqls', [])
+        page_size = data.get('page_size', 50)
+        return jsonify(query_batch(sqls, page_size))
+
     @app.route('/schema', methods=['GET'])
     def http_schema():
         table = request.args.get('table')
-        return jsonify(get_schema_filtered(table))
+        if table:
+            return jsonify(get_schema_filtered(table))
+        refresh = request.args.get('refresh') in ('1', 'true')
+        return jsonify(get_schema_cached(force_refresh=refresh))
 
     @app.route('/logs', methods=['GET'])
     def http_logs():
         return jsonify(get_logs())
 
     if __name__ == '__main__':
-        app.run(host='0.0.0.0', port=8000)
+        # threaded=True: 开发服务器并发处理请求，连接池本身线程安全
+        app.run(host='0.0.0.0', port=8000, threaded=True)
 except ImportError:
     pass
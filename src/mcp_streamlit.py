@@ -1,11 +1,10 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 import time
 import uuid
+from collections import deque
 from datetime import datetime
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 import dotenv
 
 # 导入现有的模块
@@ -72,6 +71,40 @@ st.markdown("""
 
 dotenv.load_dotenv()
 
+@st.cache_resource
+def get_llm_client():
+    """LLM客户端跨rerun/跨会话复用，避免每次查询重建Session和TLS握手"""
+    return create_llm_client()
+
+PAGE_SIZE = 50  # 数据表每页行数，与服务端分页对齐
+
+@st.cache_data(ttl=300, show_spinner=False, max_entries=64)
+def fetch_page(sql: str, page: int, page_size: int, session_id: str) -> Dict[str, Any]:
+    """按页从服务端拉取查询结果并缓存，翻回已看过的页不再发请求"""
+    return mcp_query(sql, page=page, page_size=page_size, session_id=session_id)
+
+def _rows_to_page_df(rows: List[Dict[str, Any]], page: int, page_size: int) -> pd.DataFrame:
+    """把一页行数据组装成带全局行号索引的DataFrame"""
+    # from_records走记录数组快路径，跳过逐行dict的类型推断分支
+    page_df = pd.DataFrame.from_records(rows)
+    # JSON传输会把DECIMAL等数值列变成object dtype字符串，整列可转数值的
+    # 压回数值类型：内存减半以上，图表的数值列识别也不再漏判
+    for col, dtype in page_df.dtypes.items():
+        if dtype.kind == "O":
+            try:
+                page_df[col] = pd.to_numeric(page_df[col], downcast="integer")
+            except (ValueError, TypeError):
+                pass
+    start = (page - 1) * page_size
+    page_df.index = range(start + 1, start + len(page_df) + 1)
+    return page_df
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def get_page_df(sql: str, page: int, page_size: int, session_id: str) -> pd.DataFrame:
+    """拉取并组装指定页的展示DataFrame，最多缓存最近8页"""
+    result = fetch_page(sql, page - 1, page_size, session_id)
+    return _rows_to_page_df(result.get('results') or [], page, page_size)
+
 class StreamlitNLQuerySystem:
     """Streamlit版本的自然语言查询系统（HTTP API 版）"""
     def __init__(self):
@@ -85,7 +118,7 @@ class StreamlitNLQuerySystem:
             schema_info = None
             if use_schema:
                 schema_info = mcp_schema()
-            llm_client = create_llm_client()
+            llm_client = get_llm_client()
             # 多轮上下文支持
             if 'llm_history' not in st.session_state:
                 st.session_state.llm_history = []
@@ -96,7 +129,9 @@ class StreamlitNLQuerySystem:
                 {"role": "user", "content": question},
                 {"role": "assistant", "content": sql}
             ]
-            query_result = mcp_query(sql, page=0, page_size=1000000, session_id=self.session_id, user_message=question)
+            # 只取第一页：服务端用LIMIT/OFFSET分页，翻页时再按需拉取，
+            # 不再把最多百万行整体物化到Python再切片
+            query_result = mcp_query(sql, page=0, page_size=PAGE_SIZE, session_id=self.session_id, user_message=question)
             return {
                 "question": question,
                 "sql": sql,
@@ -119,15 +154,31 @@ class StreamlitNLQuerySystem:
                 "session_id": self.session_id
             }
 
+def _classify_columns(df: pd.DataFrame):
+    """一趟dtype扫描把列分成（数值, 分类, 时间）三组。
+
+    select_dtypes每次调用都要遍历块管理器并构造新DataFrame，
+    detect_chart_type和create_visualization原本各调三次，这里
+    只看df.dtypes的kind一次分完。
+    """
+    numeric_cols, categorical_cols, datetime_cols = [], [], []
+    for col, dtype in df.dtypes.items():
+        kind = dtype.kind
+        if kind in "iuf":
+            numeric_cols.append(col)
+        elif kind == "O" or isinstance(dtype, pd.CategoricalDtype):
+            categorical_cols.append(col)
+        elif kind == "M":
+            datetime_cols.append(col)
+    return numeric_cols, categorical_cols, datetime_cols
+
 def detect_chart_type(df: pd.DataFrame, columns: List[str]) -> str:
     """根据数据类型自动检测合适的图表类型"""
     if df.empty or len(columns) < 1:
         return "table"
-    
-    numeric_cols = df.select_dtypes(include=['number']).columns.tolist()
-    categorical_cols = df.select_dtypes(include=['object', 'category']).columns.tolist()
-    datetime_cols = df.select_dtypes(include=['datetime']).columns.tolist()
-    
+
+    numeric_cols, categorical_cols, datetime_cols = _classify_columns(df)
+
     # 时间序列数据
     if len(datetime_cols) >= 1 and len(numeric_cols) >= 1:
         return "line"
@@ -150,17 +201,25 @@ def detect_chart_type(df: pd.DataFrame, columns: List[str]) -> str:
     
     return "table"
 
-def create_visualization(df: pd.DataFrame, chart_type: str, title: str = "查询结果可视化") -> go.Figure:
-    """创建可视化图表"""
+@st.cache_data(show_spinner=False)
+def create_visualization(df: pd.DataFrame, chart_type: str, title: str = "查询结果可视化") -> "Optional[go.Figure]":
+    """创建可视化图表；表格类结果返回None，由调用方用st.dataframe展示。
+
+    结果按(df内容, 图表类型, 标题)缓存：Streamlit每次交互都重跑整个
+    脚本，切换图表类型或翻页时不必重建并重新序列化Plotly图表对象。
+    """
+    # plotly导入耗时近秒级且仅绘图时用到，延迟到首次真正画图再加载，
+    # 降低应用冷启动时间（Python模块缓存保证之后零开销）
+    import plotly.express as px
+    import plotly.graph_objects as go
+
     if df.empty:
         fig = go.Figure()
         fig.add_annotation(text="没有数据可显示", showarrow=False, font=dict(size=20))
         return fig
     
-    numeric_cols = df.select_dtypes(include=['number']).columns.tolist()
-    categorical_cols = df.select_dtypes(include=['object', 'category']).columns.tolist()
-    datetime_cols = df.select_dtypes(include=['datetime']).columns.tolist()
-    
+    numeric_cols, categorical_cols, datetime_cols = _classify_columns(df)
+
     try:
         if chart_type == "bar" and len(categorical_cols) >= 1 and len(numeric_cols) >= 1:
             fig = px.bar(df, x=categorical_cols[0], y=numeric_cols[0], title=title)
@@ -192,17 +251,12 @@ def create_visualization(df: pd.DataFrame, chart_type: str, title: str = "查询
             fig = px.box(df, x=x_col, y=y_col, title=title)
             
         else:
-            # 默认创建一个简单的表格可视化
-            fig = go.Figure(data=[go.Table(
-                header=dict(values=list(df.columns),
-                           fill_color='paleturquoise',
-                           align='left'),
-                cells=dict(values=[df[col] for col in df.columns],
-                          fill_color='lavender',
-                          align='left'))
-            ])
-            fig.update_layout(title=title)
-            
+            # 表格类结果不再构造go.Table：那会把每个单元格都序列化进
+            # Plotly JSON送往浏览器，大结果集直接拖垮前端；分页的
+            # st.dataframe（Arrow传输、虚拟滚动）已覆盖表格展示
+            return None
+
+
         # 统一设置图表样式
         fig.update_layout(
             height=500,
@@ -218,15 +272,18 @@ def create_visualization(df: pd.DataFrame, chart_type: str, title: str = "查询
         fig.add_annotation(text=f"图表创建失败: {str(e)}", showarrow=False, font=dict(size=16))
         return fig
 
+MAX_HISTORY = 10  # 历史记录上限，超出自动淘汰最旧的
+
 def display_query_history():
     """显示查询历史"""
     if 'query_history' not in st.session_state:
-        st.session_state.query_history = []
-    
+        st.session_state.query_history = deque(maxlen=MAX_HISTORY)
+
     if st.session_state.query_history:
         st.subheader("📚 查询历史")
-        for i, history_item in enumerate(reversed(st.session_state.query_history[-10:])):  # 显示最近10条
-            with st.expander(f"查询 {len(st.session_state.query_history)-i}: {history_item['question'][:50]}..."):
+        # deque已是最新在前，直接遍历，无需切片+反转
+        for history_item in st.session_state.query_history:
+            with st.expander(f"查询 {history_item['seq']}: {history_item['question'][:50]}..."):
                 st.markdown(f"**问题:** {history_item['question']}")
                 st.markdown(f"**SQL:** `{history_item['sql']}`")
                 st.markdown(f"**时间:** {history_item['timestamp']}")
@@ -268,10 +325,12 @@ def main():
                 with st.spinner("正在处理您的查询..."):
                     # 执行查询
                     result = system.query_database(question)
-                    # 保存到历史记录
+                    # 保存到历史记录（有界deque，最新在前）
                     if 'query_history' not in st.session_state:
-                        st.session_state.query_history = []
+                        st.session_state.query_history = deque(maxlen=MAX_HISTORY)
+                    st.session_state.query_count = st.session_state.get('query_count', 0) + 1
                     history_item = {
+                        'seq': st.session_state.query_count,
                         'question': question,
                         'sql': result['sql'],
                         'success': result['query_result']['success'],
@@ -279,14 +338,8 @@ def main():
                         'error': result['query_result'].get('error', ''),
                         'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
                     }
-                    st.session_state.query_history.append(history_item)
-                    # 缓存本次查询的 DataFrame
-                    if result['query_result']['success']:
-                        results = result['query_result']['results']
-                        st.session_state['last_query_df'] = pd.DataFrame(results) if results else pd.DataFrame()
-                    else:
-                        st.session_state['last_query_df'] = None
-                    # 缓存查询结果区块内容
+                    st.session_state.query_history.appendleft(history_item)
+                    # 缓存查询结果区块内容（只含第一页数据）
                     st.session_state['last_query_result'] = result
             else:
                 st.warning("请输入查询问题")
@@ -312,20 +365,21 @@ def main():
                 </div>
                 """, unsafe_allow_html=True)
 
-        # 查询按钮外部，始终显示分页表格
-        df_cache = st.session_state.get('last_query_df', None)
-        if df_cache is not None and not df_cache.empty:
+        # 查询按钮外部，始终显示分页表格；数据按页从服务端拉取
+        if last_result is not None and last_result['query_result'].get('success') \
+                and last_result['query_result'].get('results'):
             st.subheader("📊 数据表")
-            page_size = 50
-            total_rows = len(df_cache)
-            total_pages = (total_rows + page_size - 1) // page_size if total_rows > 0 else 1
+            qr = last_result['query_result']
+            total_rows = qr.get('totalRows') or qr.get('rowCount', 0)
+            total_pages = (total_rows + PAGE_SIZE - 1) // PAGE_SIZE if total_rows > 0 else 1
             page = st.number_input("页码", min_value=1, max_value=total_pages, value=1, step=1, key="page_number")
-            start = (page - 1) * page_size
-            end = start + page_size
-            page_df = df_cache.iloc[start:end].copy()
-            page_df.index = range(start + 1, min(end, total_rows) + 1)
+            if page == 1:
+                # 第一页随查询结果一起返回，直接复用
+                page_df = _rows_to_page_df(qr.get('results') or [], page, PAGE_SIZE)
+            else:
+                page_df = get_page_df(last_result['sql'], page, PAGE_SIZE, system.session_id)
             st.dataframe(page_df, use_container_width=True)
-            st.info(f"当前第 {page}/{total_pages} 页，每页 {page_size} 条，共 {total_rows} 条")
+            st.info(f"当前第 {page}/{total_pages} 页，每页 {PAGE_SIZE} 条，共 {total_rows} 条")
         else:
             st.info("无数据可显示")
 
@@ -1,32 +1,6 @@
 from mcp_llm_client import create_llm_client
 from mcp_http_client import mcp_query, mcp_schema
-
-def format_table(results):
-    if not results:
-        return "无数据"
-    
-    columns = list(results[0].keys())
-    
-    # 计算每列最大宽度
-    col_widths = []
-    for col in columns:
-        col_widths.append(max(len(str(col)), max(len(str(row.get(col, ""))) for row in results)))
-    
-    # 表头
-    header_cells = [str(col).ljust(w) for col, w in zip(columns, col_widths)]
-    header = "| " + " | ".join(header_cells) + " |"
-    
-    # 分隔线
-    sep_cells = ["-" * w for w in col_widths]
-    sep = "| " + " | ".join(sep_cells) + " |"
-    
-    # 数据行
-    rows = []
-    for row in results:
-        row_cells = [str(row.get(col, "")).ljust(w) for col, w in zip(columns, col_widths)]
-        rows.append("| " + " | ".join(row_cells) + " |")
-    
-    return "\n".join([header, sep] + rows)
+from mcp_cli import format_table
 
 def main():
     print("🚀 智能自然语言查询系统启动")
@@ -37,6 +11,9 @@ def main():
     print("=" * 50)
     print()
     
+    # 客户端与表结构整个会话只初始化/拉取一次，不在循环里重建
+    llm_client = create_llm_client()
+    schema_info = None
     while True:
         question = input("🤔 请输入您的问题: ").strip()
         
@@ -49,11 +26,11 @@ def main():
         
         print(f"\n🔍 处理您的问题: {question}")
         
-        # 获取 schema
-        schema_info = mcp_schema()
+        # 获取 schema（仅首次）
+        if schema_info is None:
+            schema_info = mcp_schema()
         
         # LLM 生成 SQL
-        llm_client = create_llm_client()
         sql = llm_client.generate_sql(question, schema_info)
         print(f"生成SQL: {sql}")
         
@@ -2,6 +2,7 @@ import os
 import sys
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
 from mcp_server import query_data, get_conversation_context, get_conversation_suggestions, clear_conversation_context
+from mcp_cli import format_table
 import time
 import uuid
 
@@ -93,8 +94,8 @@ def interactive_demo():
             results = result.get('results', [])
             if results:
                 print(f"\n📋 查询结果（前3行）:")
-                for i, row in enumerate(results[:3], 1):
-                    print(f"  行{i}: {row}")
+                # 复用CLI的表格渲染，一次性格式化，替代逐行dict repr
+                print(format_table(results[:3]))
                 if len(results) > 3:
                     print(f"  ... 还有 {len(results) - 3} 行数据")
             else:
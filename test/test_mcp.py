@@ -58,4 +58,10 @@ async def test_mcp_server():
         print("- 确保MySQL服务正在运行")
 
 if __name__ == "__main__":
+    # 可选用uvloop加速事件循环（stdio管道I/O较多时有收益），未安装则用默认循环
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
     asyncio.run(test_mcp_server())
\ No newline at end of file